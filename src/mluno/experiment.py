@@ -0,0 +1,196 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mluno.conformal import ConformalPredictor
+from mluno.data import make_sine_data, split_data
+from mluno.metrics import coverage, sharpness
+from mluno.regressors import KNNRegressor, LinearRegressor
+
+
+# each constructor takes the grid's k value, which only some regressors use
+REGRESSORS = {
+    "knn": lambda k: KNNRegressor(k=k),
+    "linear": lambda k: LinearRegressor(),
+}
+
+COLUMNS = ["trial", "regressor", "k", "alpha", "n_samples", "sd", "coverage", "sharpness"]
+
+
+def run_experiment(grid, n_trials=100, holdout_size=0.2, random_seed=None, n_jobs=1, path=None, row_group_size=1_000):
+    """
+    Repeat a conformal prediction experiment over a grid of configurations.
+
+    Parameters
+    ----------
+    grid : `dict`
+        A dictionary with the keys `regressor`, `alpha`, `n_samples` and `sd`, each mapping to a non-empty list of values. Every combination of the values is run. `regressor` is one of `"knn"` or `"linear"`. The key `k` is only needed for `"knn"`, and `"linear"` rows record `k` as 0.
+
+    n_trials : `int`
+        Number of times each configuration is repeated.
+
+    holdout_size : `float`
+        The proportion of the data used to calculate coverage and sharpness in each trial.
+
+    random_seed : `int`
+        Seed to control randomness.
+
+    n_jobs : `int`
+        Number of worker processes. The results do not depend on this value.
+
+    path : `str`
+        If given, the results are streamed to this Parquet file instead of being kept in memory. Requires `pyarrow`.
+
+    row_group_size : `int`
+        Number of rows buffered before they are written to `path`.
+
+    Returns
+    -------
+    `dict` or `str`
+        A dictionary mapping each column name to a 1D `ndarray` with one entry per trial and configuration, or `path` if it is given. The columns are `trial`, `regressor`, `k`, `alpha`, `n_samples`, `sd`, `coverage` and `sharpness`.
+
+    Notes
+    -----
+    Each trial gets its own stream spawned from a `numpy.random.SeedSequence` of `random_seed`, so a trial is reproducible on its own regardless of which process runs it. Every configuration with the same `n_samples` and `sd` sees the same data in a given trial, so each dataset is generated once and shared between them.
+    """
+    if n_trials < 1:
+        raise ValueError(f"n_trials must be at least 1, got {n_trials}.")
+    for key in ["regressor", "alpha", "n_samples", "sd"]:
+        if len(grid[key]) == 0:
+            raise ValueError(f"grid[{key!r}] must not be empty.")
+
+    models = _expand_models(grid)
+    datasets = list(itertools.product(grid["n_samples"], grid["sd"]))
+    trial_seeds = [
+        [int(seed) for seed in child.generate_state(2)]
+        for child in np.random.SeedSequence(random_seed).spawn(n_trials)
+    ]
+    tasks = [
+        (trial, n_samples, sd, trial_seeds[trial], holdout_size, models)
+        for (n_samples, sd), trial in itertools.product(datasets, range(n_trials))
+    ]
+
+    if path is None:
+        batches = []
+        _run_tasks(tasks, n_jobs, batches.append)
+        return {name: np.concatenate([batch[name] for batch in batches]) for name in COLUMNS}
+
+    writer = _ParquetWriter(path, row_group_size)
+    try:
+        _run_tasks(tasks, n_jobs, writer.write)
+    finally:
+        writer.close()
+    return path
+
+
+def _run_tasks(tasks, n_jobs, handle):
+
+    if n_jobs == 1:
+        for batch in map(_run_task, tasks):
+            handle(batch)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            # map yields in submission order, so the output is independent of scheduling
+            for batch in executor.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * n_jobs))):
+                handle(batch)
+
+
+def _expand_models(grid):
+
+    models = []
+    for regressor in grid["regressor"]:
+        if regressor not in REGRESSORS:
+            raise ValueError(f"Unknown regressor {regressor!r}, expected one of {sorted(REGRESSORS)}.")
+        if regressor == "knn":
+            if len(grid.get("k", [])) == 0:
+                raise ValueError("grid['k'] must not be empty when 'knn' is requested.")
+            ks = grid["k"]
+        else:
+            # linear regression has no k, so it is only expanded over alpha
+            ks = [0]
+        for k, alpha in itertools.product(ks, grid["alpha"]):
+            model = (regressor, k, alpha)
+            if model not in models:
+                models.append(model)
+    return models
+
+
+def _run_task(task):
+
+    trial, n_samples, sd, (data_seed, split_seed), holdout_size, models = task
+    X, y = make_sine_data(n_samples=n_samples, sd=sd, random_seed=data_seed)
+    X_train, X_test, y_train, y_test = split_data(X, y, holdout_size=holdout_size, random_seed=split_seed)
+
+    coverages = []
+    sharpnesses = []
+    for regressor, k, alpha in models:
+        conformal_predictor = ConformalPredictor(REGRESSORS[regressor](k), alpha=alpha)
+        conformal_predictor.fit(X_train, y_train)
+        _, y_lower, y_upper = conformal_predictor.predict(X_test)
+        coverages.append(coverage(y_test, y_lower, y_upper))
+        sharpnesses.append(sharpness(y_lower, y_upper))
+
+    n_models = len(models)
+    return {
+        "trial": np.full(n_models, trial, dtype=np.int64),
+        "regressor": np.array([model[0] for model in models]),
+        "k": np.array([model[1] for model in models], dtype=np.int64),
+        "alpha": np.array([model[2] for model in models], dtype=np.float64),
+        "n_samples": np.full(n_models, n_samples, dtype=np.int64),
+        "sd": np.full(n_models, sd, dtype=np.float64),
+        "coverage": np.array(coverages, dtype=np.float64),
+        "sharpness": np.array(sharpnesses, dtype=np.float64),
+    }
+
+
+class _ParquetWriter:
+
+    def __init__(self, path, row_group_size):
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("Writing results to a file requires pyarrow, install it with `pip install mluno[experiment]`.") from error
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("trial", pa.int64()),
+            ("regressor", pa.string()),
+            ("k", pa.int64()),
+            ("alpha", pa.float64()),
+            ("n_samples", pa.int64()),
+            ("sd", pa.float64()),
+            ("coverage", pa.float64()),
+            ("sharpness", pa.float64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._pending = []
+        self._n_pending = 0
+
+    def write(self, batch):
+
+        # each task only yields a handful of rows, so buffer them into larger row groups
+        self._pending.append(batch)
+        self._n_pending += len(batch["trial"])
+        if self._n_pending >= self._row_group_size:
+            self._flush()
+
+    def close(self):
+
+        self._flush()
+        self._writer.close()
+
+    def _flush(self):
+
+        if not self._pending:
+            return
+        arrays = [
+            self._pa.array(np.concatenate([batch[name] for batch in self._pending]), type=self._schema.field(name).type)
+            for name in COLUMNS
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        self._pending = []
+        self._n_pending = 0
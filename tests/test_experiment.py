@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from mluno.experiment import run_experiment
+
+GRID = {
+    "regressor": ["knn", "linear"],
+    "k": [3, 5],
+    "alpha": [0.1, 0.2],
+    "n_samples": [50],
+    "sd": [0.5, 1],
+}
+
+def test_run_experiment():
+    results = run_experiment(GRID, n_trials=3, random_seed=42)
+    # knn: 2 k x 2 alpha, linear: 2 alpha, for each of 2 sd and 3 trials
+    assert len(results["trial"]) == (4 + 2) * 2 * 3
+    assert set(results["regressor"]) == {"knn", "linear"}
+    assert np.all(results["k"][results["regressor"] == "linear"] == 0)
+    assert np.all((results["coverage"] >= 0) & (results["coverage"] <= 1))
+    assert np.all(results["sharpness"] >= 0)
+
+def test_run_experiment_with_seed():
+    results1 = run_experiment(GRID, n_trials=3, random_seed=42)
+    results2 = run_experiment(GRID, n_trials=3, random_seed=42, n_jobs=2)
+    results3 = run_experiment(GRID, n_trials=3, random_seed=1)
+    for name in results1:
+        assert np.array_equal(results1[name], results2[name])
+    assert not np.array_equal(results1["coverage"], results3["coverage"])
+
+def test_run_experiment_unknown_regressor():
+    with pytest.raises(ValueError):
+        run_experiment({**GRID, "regressor": ["tree"]}, n_trials=1)
+
+def test_run_experiment_linear_without_k():
+    grid = {"regressor": ["linear"], "alpha": [0.1, 0.2], "n_samples": [50], "sd": [1]}
+    results = run_experiment(grid, n_trials=2, random_seed=42)
+    assert len(results["trial"]) == 2 * 2
+    assert np.all(results["regressor"] == "linear")
+    assert np.all(results["k"] == 0)
+
+    # an empty k list does not drop the linear configurations
+    results_empty_k = run_experiment({**grid, "k": []}, n_trials=2, random_seed=42)
+    for name in results:
+        assert np.array_equal(results[name], results_empty_k[name])
+
+def test_run_experiment_knn_without_k():
+    with pytest.raises(ValueError):
+        run_experiment({**GRID, "k": []}, n_trials=1)
+    grid = {key: value for key, value in GRID.items() if key != "k"}
+    with pytest.raises(ValueError):
+        run_experiment(grid, n_trials=1)
+
+def test_run_experiment_empty():
+    with pytest.raises(ValueError):
+        run_experiment(GRID, n_trials=0)
+    for key in ["regressor", "alpha", "n_samples", "sd"]:
+        with pytest.raises(ValueError):
+            run_experiment({**GRID, key: []}, n_trials=1)
+
+def test_run_experiment_to_file(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "results.parquet"
+    results = run_experiment(GRID, n_trials=2, random_seed=42)
+    assert run_experiment(GRID, n_trials=2, random_seed=42, path=path, row_group_size=5) == path
+    table = pq.read_table(path)
+    assert table.num_rows == len(results["trial"])
+    assert table.to_pydict() == {name: column.tolist() for name, column in results.items()}